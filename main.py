@@ -1,7 +1,15 @@
 import os
+import re
+import time
+import hashlib
+import asyncio
+import functools
 import logging
 import feedparser
+import httpx
+from collections import OrderedDict
 from telegram import Update, BotCommand, InlineKeyboardButton, InlineKeyboardMarkup, ReplyKeyboardMarkup, KeyboardButton
+from telegram.error import BadRequest, RetryAfter, TelegramError
 from telegram.ext import Application, CommandHandler, MessageHandler, CallbackQueryHandler, filters, ContextTypes
 import google.generativeai as genai
 
@@ -17,7 +25,14 @@ TELEGRAM_TOKEN = os.getenv("TELEGRAM_TOKEN")
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 
 genai.configure(api_key=GOOGLE_API_KEY)
-model = genai.GenerativeModel("gemini-3-flash-preview")
+
+# Shared HTTP client so repeat fetches reuse keep-alive connections
+http_client = httpx.AsyncClient(
+    timeout=15,
+    follow_redirects=True,
+    headers={"User-Agent": "filmmaker_ogbot/1.0"},
+    limits=httpx.Limits(max_connections=32, max_keepalive_connections=16),
+)
 
 # === RSS FEEDS ===
 NEWS_FEEDS = {
@@ -27,6 +42,33 @@ NEWS_FEEDS = {
     "screendaily": "https://www.screendaily.com/feed",
     "indiewire": "https://www.indiewire.com/feed/",
 }
+SOURCE_LABELS = {name: name.upper() for name in NEWS_FEEDS}
+FEED_TTL = 60  # seconds a parsed feed is served from cache
+FEED_ENTRY_LIMIT = 10  # most entries any command shows from one feed
+
+# === MENU LOOKUPS ===
+SOURCE_NAMES = {"deadline": "Deadline", "variety": "Variety", "thr": "Hollywood Reporter"}
+
+CATEGORY_FILTERS = {
+    "aitech": ("AI & Tech", re.compile(r"AI|tech|streaming|digital|algorithm", re.IGNORECASE)),
+    "guilds": ("Guilds & Labor", re.compile(r"guild|union|strike|WGA|SAG|DGA|IATSE|labor", re.IGNORECASE)),
+    "market": ("Box Office & Market", re.compile(r"box office|market|stock|earnings|revenue", re.IGNORECASE)),
+    "spotlight": ("Spotlight", None),
+    "trending": ("Trending", None),
+    "general": ("General", None),
+}
+
+MENU_RESPONSES = {
+    "vault": "🗄 *VAULT*\n\nYour vault is empty.\n\n_Reply 'save' after analysis to store._",
+    "scout": "🔎 *SCOUT*\n\nType a topic to investigate.",
+    "finance": "💵 *FINANCE*\n\nAsk about financing, funds, or deals.",
+    "archive": "📚 *ARCHIVE*\n\n_Coming soon: Historical deal database._",
+}
+
+SEPARATOR = "━" * 25
+
+# Characters that break Telegram's legacy Markdown when they appear in feed text
+MARKDOWN_ESCAPES = str.maketrans({"_": "\\_", "*": "\\*", "[": "\\[", "`": "\\`"})
 
 # === SYSTEM INSTRUCTION ===
 SYSTEM_INSTRUCTION = """You are an elite film industry intelligence analyst. Use emojis strategically.
@@ -35,58 +77,156 @@ Expertise: Deal analysis, financing forensics, streaming strategy, BS detection,
 
 Style: Direct, analytical, sardonic. No fluff. Label speculation clearly."""
 
+model = genai.GenerativeModel("gemini-3-flash-preview", system_instruction=SYSTEM_INSTRUCTION)
+RESPONSE_CACHE_TTL = 24 * 3600  # seconds an opening reply is reused
+RESPONSE_CACHE_SIZE = 512
+STREAM_EDIT_INTERVAL = 1.0  # Telegram allows about one message edit per second per chat
+MAX_MESSAGE_LENGTH = 4096  # Telegram's limit for a single text message
+
+MAX_TRACKED_USERS = 10000
+
+
+class LRUDict(OrderedDict):
+    """Dict capped at maxsize entries that evicts the least recently set key."""
+
+    def __init__(self, maxsize, *args, **kwargs):
+        self.maxsize = maxsize  # set first, since initial items go through __setitem__
+        super().__init__(*args, **kwargs)
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.move_to_end(key)
+        if len(self) > self.maxsize:
+            self.popitem(last=False)
+
+    def copy(self):
+        return type(self)(self.maxsize, self)
+
+    def __reduce__(self):
+        return type(self), (self.maxsize, list(self.items()))
+
+
 # Storage
-conversations = {}
-vault_items = {}
+conversations = LRUDict(MAX_TRACKED_USERS)
+vault_items = LRUDict(MAX_TRACKED_USERS)
+feed_cache = {}  # feed name -> (expires_at, articles, etag, last_modified)
+response_cache = LRUDict(RESPONSE_CACHE_SIZE)  # prompt digest -> (expires_at, reply)
 
 
-def get_persistent_keyboard():
-    """Persistent keyboard below input field."""
-    keyboard = [
+# === KEYBOARDS ===
+# Static markups, built once and shared by every reply
+PERSISTENT_KEYBOARD = ReplyKeyboardMarkup(
+    [
         [KeyboardButton("📰 Latest News"), KeyboardButton("🔥 Trending")],
         [KeyboardButton("🗄 Vault"), KeyboardButton("🔎 Scout")],
         [KeyboardButton("💵 Finance"), KeyboardButton("📚 Archive")],
-    ]
-    return ReplyKeyboardMarkup(keyboard, resize_keyboard=True, is_persistent=True)
+    ],
+    resize_keyboard=True,
+    is_persistent=True,
+)
+
+MAIN_KEYBOARD = InlineKeyboardMarkup([
+    [
+        InlineKeyboardButton("🤖 AI/Tech", callback_data="cat_aitech"),
+        InlineKeyboardButton("🎭 Guilds", callback_data="cat_guilds"),
+        InlineKeyboardButton("📊 Market", callback_data="cat_market"),
+    ],
+    [
+        InlineKeyboardButton("⭐ Spotlight", callback_data="cat_spotlight"),
+        InlineKeyboardButton("🔥 Trending", callback_data="cat_trending"),
+        InlineKeyboardButton("📰 General", callback_data="cat_general"),
+    ],
+    [
+        InlineKeyboardButton("📡 Deadline", callback_data="src_deadline"),
+        InlineKeyboardButton("📡 Variety", callback_data="src_variety"),
+        InlineKeyboardButton("📡 THR", callback_data="src_thr"),
+    ],
+    [
+        InlineKeyboardButton("🗄 Intelligence Vault", callback_data="vault"),
+        InlineKeyboardButton("🔎 Scout", callback_data="scout"),
+    ],
+    [
+        InlineKeyboardButton("💵 Finance Leads", callback_data="finance"),
+        InlineKeyboardButton("📚 Master Archive", callback_data="archive"),
+    ],
+])
+
+BACK_KEYBOARD = InlineKeyboardMarkup([[InlineKeyboardButton("◀️ Back to Menu", callback_data="main_menu")]])
+
+
+def get_persistent_keyboard():
+    """Persistent keyboard below input field."""
+    return PERSISTENT_KEYBOARD
 
 
 def get_main_keyboard():
     """Inline keyboard attached to messages."""
-    keyboard = [
-        [
-            InlineKeyboardButton("🤖 AI/Tech", callback_data="cat_aitech"),
-            InlineKeyboardButton("🎭 Guilds", callback_data="cat_guilds"),
-            InlineKeyboardButton("📊 Market", callback_data="cat_market"),
-        ],
-        [
-            InlineKeyboardButton("⭐ Spotlight", callback_data="cat_spotlight"),
-            InlineKeyboardButton("🔥 Trending", callback_data="cat_trending"),
-            InlineKeyboardButton("📰 General", callback_data="cat_general"),
-        ],
-        [
-            InlineKeyboardButton("📡 Deadline", callback_data="src_deadline"),
-            InlineKeyboardButton("📡 Variety", callback_data="src_variety"),
-            InlineKeyboardButton("📡 THR", callback_data="src_thr"),
-        ],
-        [
-            InlineKeyboardButton("🗄 Intelligence Vault", callback_data="vault"),
-            InlineKeyboardButton("🔎 Scout", callback_data="scout"),
-        ],
-        [
-            InlineKeyboardButton("💵 Finance Leads", callback_data="finance"),
-            InlineKeyboardButton("📚 Master Archive", callback_data="archive"),
-        ],
-    ]
-    return InlineKeyboardMarkup(keyboard)
+    return MAIN_KEYBOARD
 
 
 def get_back_keyboard():
-    keyboard = [[InlineKeyboardButton("◀️ Back to Menu", callback_data="main_menu")]]
-    return InlineKeyboardMarkup(keyboard)
+    return BACK_KEYBOARD
+
+
+async def fetch_feed(name, url):
+    """Download and parse a single RSS feed, reusing a fresh cached copy."""
+    now = time.monotonic()
+    cached = feed_cache.get(name)
+    if cached and cached[0] > now:
+        return cached[1]
+    
+    # Revalidate a stale copy so unchanged feeds come back as an empty 304
+    headers = {}
+    if cached:
+        _, _, etag, last_modified = cached
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+    
+    try:
+        resp = await http_client.get(url, headers=headers)
+        if cached and resp.status_code == 304:
+            feed_cache[name] = (now + FEED_TTL, *cached[1:])
+            return cached[1]
+        resp.raise_for_status()
+    except httpx.HTTPError as e:
+        if not cached:
+            raise
+        # A stale copy beats dropping the source from the reply
+        logger.warning(f"Feed refresh failed {name}, serving cached copy: {e}")
+        return cached[1]
+    # Parsing is CPU-bound, so keep it off the event loop. Only titles and links are
+    # shown, so skip the HTML sanitizer and relative-URI passes over entry content.
+    # The response headers carry the charset and base URL feedparser would see fetching itself.
+    feed = await asyncio.to_thread(
+        feedparser.parse, resp.content, sanitize_html=False, resolve_relative_uris=False,
+        response_headers={"content-location": str(resp.url), **resp.headers},
+    )
+    
+    articles = []
+    for entry in feed.entries[:FEED_ENTRY_LIMIT]:
+        pub = entry.get("published", "")
+        articles.append({
+            "source": SOURCE_LABELS[name],
+            "title": entry.get("title", "No title"),
+            "link": entry.get("link", ""),
+            "published": pub[:16] if pub else "",
+        })
+    
+    feed_cache[name] = (now + FEED_TTL, articles, resp.headers.get("ETag"), resp.headers.get("Last-Modified"))
+    return articles
+
 
+def feeds_fresh(source=None):
+    """Whether fetch_news(source) can be served entirely from the feed cache."""
+    names = [source] if source in NEWS_FEEDS else NEWS_FEEDS
+    now = time.monotonic()
+    return all(name in feed_cache and feed_cache[name][0] > now for name in names)
 
-def fetch_news_sync(source=None, limit=5):
-    """Fetch news from RSS feeds."""
+
+async def fetch_news(source=None, limit=5):
+    """Fetch news from RSS feeds concurrently."""
     articles = []
     
     if source and source in NEWS_FEEDS:
@@ -94,19 +234,16 @@ def fetch_news_sync(source=None, limit=5):
     else:
         feeds = NEWS_FEEDS
     
-    for name, url in feeds.items():
-        try:
-            feed = feedparser.parse(url)
-            for entry in feed.entries[:limit]:
-                pub = entry.get("published", "")
-                articles.append({
-                    "source": name.upper(),
-                    "title": entry.get("title", "No title"),
-                    "link": entry.get("link", ""),
-                    "published": pub[:16] if pub else "",
-                })
-        except Exception as e:
-            logger.error(f"Feed error {name}: {e}")
+    results = await asyncio.gather(
+        *(fetch_feed(name, url) for name, url in feeds.items()),
+        return_exceptions=True
+    )
+    
+    for name, feed_articles in zip(feeds, results):
+        if isinstance(feed_articles, Exception):
+            logger.error(f"Feed error {name}: {feed_articles}")
+            continue
+        articles.extend(feed_articles[:limit])
     
     return articles[:limit] if source else articles[:10]
 
@@ -116,16 +253,105 @@ def format_articles(articles, category="Latest"):
     if not articles:
         return f"📭 No {category} articles found. Try again later."
     
-    lines = [f"📰 *{category.upper()} INTEL*", "━" * 25, ""]
+    return render_articles(tuple((a["source"], a["title"], a["link"]) for a in articles), category)
+
+
+@functools.lru_cache(maxsize=64)
+def render_articles(articles, category):
+    """Markdown for a (source, title, link) snapshot, memoized across identical views."""
+    body = "\n\n".join(
+        f"*{i}. [{source}]*\n   {title.translate(MARKDOWN_ESCAPES)}\n   🔗 [Read]({link})"
+        for i, (source, title, link) in enumerate(articles, 1)
+    )
+    return f"📰 *{category.upper()} INTEL*\n{SEPARATOR}\n\n{body}\n\n💡 _Send any headline for analysis_"
+
+
+def markdown_balanced(text):
+    """Whether legacy Markdown markers in text are paired."""
+    return text.count("*") % 2 == 0 and text.count("_") % 2 == 0 and text.count("`") % 2 == 0
+
+
+def response_cache_key(message):
+    """Digest of a normalized prompt for the opening-reply cache."""
+    return hashlib.blake2b(message.strip().lower().encode(), digest_size=16).digest()
+
+
+def get_cached_response(key):
+    cached = response_cache.get(key)
+    if not cached:
+        return None
+    if cached[0] <= time.monotonic():
+        del response_cache[key]
+        return None
+    response_cache.move_to_end(key)
+    return cached[1]
+
+
+def cache_response(key, reply):
+    response_cache[key] = (time.monotonic() + RESPONSE_CACHE_TTL, reply)
+
+
+async def keep_typing(bot, chat_id):
+    """Refresh the typing indicator until cancelled; Telegram drops it after ~5s."""
+    while True:
+        try:
+            await bot.send_chat_action(chat_id=chat_id, action="typing")
+        except TelegramError as e:
+            logger.warning(f"Typing indicator failed: {e}")
+        await asyncio.sleep(4)
+
+
+async def stream_reply(message, response):
+    """Show a streamed Gemini response by growing a single reply as chunks arrive."""
+    sent = None
+    text = ""
+    next_edit = 0.0
     
-    for i, art in enumerate(articles, 1):
-        lines.append(f"*{i}. [{art['source']}]*")
-        lines.append(f"   {art['title']}")
-        lines.append(f"   🔗 [Read]({art['link']})")
-        lines.append("")
+    async for chunk in response:
+        try:
+            text += chunk.text
+        except ValueError:
+            # Chunks without parts (e.g. a trailing finish_reason) have no text
+            continue
+        if len(text) > MAX_MESSAGE_LENGTH or time.monotonic() < next_edit:
+            continue
+        next_edit = time.monotonic() + STREAM_EDIT_INTERVAL
+        # Progress updates are best-effort; a skipped edit must not abort reading the stream
+        try:
+            if sent is None:
+                sent = await message.reply_text(text)
+            else:
+                sent = await sent.edit_text(text)
+        except RetryAfter as e:
+            # Editing again before Telegram's wait is over only extends the flood ban
+            logger.warning(f"Stream updates paused for {e.retry_after}s: {e}")
+            next_edit = time.monotonic() + e.retry_after
+        except BadRequest as e:
+            logger.warning(f"Stream update skipped: {e}")
     
-    lines.append("💡 _Send any headline for analysis_")
-    return "\n".join(lines)
+    return sent, text
+
+
+async def deliver_reply(message, sent, reply):
+    """Send the finished reply, or finalise the streamed one, as Markdown when possible."""
+    # Only send as Markdown when it is likely to parse, so bad replies don't cost a rejected request
+    parse_mode = "Markdown" if markdown_balanced(reply) else None
+    try:
+        if not sent:
+            await message.reply_text(reply, parse_mode=parse_mode)
+        elif parse_mode or sent.text != reply:
+            await sent.edit_text(reply, parse_mode=parse_mode)
+    except BadRequest as e:
+        error = str(e).lower()
+        if "not modified" in error:
+            pass
+        elif parse_mode and "parse" in error:
+            if not sent:
+                await message.reply_text(reply)
+            elif sent.text != reply:
+                await sent.edit_text(reply)
+        else:
+            raise
 
 
 async def post_init(application):
@@ -148,9 +374,15 @@ async def post_init(application):
     logger.info("Bot commands set")
 
 
+async def post_shutdown(application):
+    """Release pooled HTTP connections."""
+    await http_client.aclose()
+
+
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
-    conversations[user_id] = []
+    message = update.message
+    conversations.pop(user_id, None)
     
     welcome = """🎬 *FILMMAKER INTELLIGENCE BOT* 🎬
 ━━━━━━━━━━━━━━━━━━━━━━━━━━
@@ -168,12 +400,12 @@ Ready for duty.
 ━━━━━━━━━━━━━━━━━━━━━━━━━━
 _Tap a button or send industry news to analyze._"""
     
-    await update.message.reply_text(
+    await message.reply_text(
         welcome,
         reply_markup=get_persistent_keyboard(),
         parse_mode="Markdown"
     )
-    await update.message.reply_text(
+    await message.reply_text(
         "⬇️ *SELECT A CATEGORY* ⬇️",
         reply_markup=get_main_keyboard(),
         parse_mode="Markdown"
@@ -211,59 +443,41 @@ _Or just paste any article/headline!_"""
     await update.message.reply_text(help_text, parse_mode="Markdown", reply_markup=get_main_keyboard())
 
 
-async def news_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    await update.message.reply_text("🔄 _Fetching latest intel..._", parse_mode="Markdown")
-    articles = fetch_news_sync(limit=6)
-    await update.message.reply_text(
-        format_articles(articles, "Latest"),
+async def reply_with_news(update, placeholder, category, source=None, limit=5, count=None):
+    """Reply with a feed listing, posting a placeholder only when feeds must be fetched."""
+    message = update.message
+    status = None
+    if not feeds_fresh(source):
+        status = await message.reply_text(placeholder, parse_mode="Markdown")
+    
+    articles = await fetch_news(source=source, limit=limit)
+    send = status.edit_text if status else message.reply_text
+    await send(
+        format_articles(articles[:count], category),
         parse_mode="Markdown",
         disable_web_page_preview=True,
         reply_markup=get_back_keyboard()
     )
 
 
+async def news_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    await reply_with_news(update, "🔄 _Fetching latest intel..._", "Latest", limit=6)
+
+
 async def deadline_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    await update.message.reply_text("🔄 _Fetching Deadline..._", parse_mode="Markdown")
-    articles = fetch_news_sync(source="deadline", limit=5)
-    await update.message.reply_text(
-        format_articles(articles, "Deadline"),
-        parse_mode="Markdown",
-        disable_web_page_preview=True,
-        reply_markup=get_back_keyboard()
-    )
+    await reply_with_news(update, "🔄 _Fetching Deadline..._", "Deadline", source="deadline")
 
 
 async def variety_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    await update.message.reply_text("🔄 _Fetching Variety..._", parse_mode="Markdown")
-    articles = fetch_news_sync(source="variety", limit=5)
-    await update.message.reply_text(
-        format_articles(articles, "Variety"),
-        parse_mode="Markdown",
-        disable_web_page_preview=True,
-        reply_markup=get_back_keyboard()
-    )
+    await reply_with_news(update, "🔄 _Fetching Variety..._", "Variety", source="variety")
 
 
 async def thr_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    await update.message.reply_text("🔄 _Fetching THR..._", parse_mode="Markdown")
-    articles = fetch_news_sync(source="thr", limit=5)
-    await update.message.reply_text(
-        format_articles(articles, "Hollywood Reporter"),
-        parse_mode="Markdown",
-        disable_web_page_preview=True,
-        reply_markup=get_back_keyboard()
-    )
+    await reply_with_news(update, "🔄 _Fetching THR..._", "Hollywood Reporter", source="thr")
 
 
 async def trending_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    await update.message.reply_text("🔄 _Finding trending stories..._", parse_mode="Markdown")
-    articles = fetch_news_sync(limit=8)
-    await update.message.reply_text(
-        format_articles(articles[:5], "Trending"),
-        parse_mode="Markdown",
-        disable_web_page_preview=True,
-        reply_markup=get_back_keyboard()
-    )
+    await reply_with_news(update, "🔄 _Finding trending stories..._", "Trending", limit=8, count=5)
 
 
 async def vault_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -278,9 +492,9 @@ Your vault is empty.
 
 _Reply "save" after any analysis to store it here._"""
     else:
-        text = f"🗄 *INTELLIGENCE VAULT* ({len(saved)} items)\n━━━━━━━━━━━━━━━━━━━━\n\n"
-        for i, item in enumerate(saved[-10:], 1):
-            text += f"{i}. {item[:50]}...\n"
+        text = f"🗄 *INTELLIGENCE VAULT* ({len(saved)} items)\n━━━━━━━━━━━━━━━━━━━━\n\n" + "".join(
+            f"{i}. {item[:50]}...\n" for i, item in enumerate(saved[-10:], 1)
+        )
     
     await update.message.reply_text(text, parse_mode="Markdown", reply_markup=get_back_keyboard())
 
@@ -335,12 +549,57 @@ _I'll break down what's real vs spin._"""
     await update.message.reply_text(text, parse_mode="Markdown")
 
 
+async def archive_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    await update.message.reply_text("📚 *ARCHIVE*\n\n_Coming soon._", parse_mode="Markdown")
+
+
 async def clear_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
-    conversations[user_id] = []
+    conversations.pop(user_id, None)
     await update.message.reply_text("🧹 *CLEARED* - Fresh start.", parse_mode="Markdown")
 
 
+async def show_source_feed(query, source):
+    """Source-specific feed for a src_<source> button."""
+    if not feeds_fresh(source):
+        await query.edit_message_text(f"🔄 _Fetching {SOURCE_NAMES.get(source, source)}..._", parse_mode="Markdown")
+    articles = await fetch_news(source=source, limit=5)
+    await query.edit_message_text(
+        format_articles(articles, SOURCE_NAMES.get(source, source)),
+        parse_mode="Markdown",
+        disable_web_page_preview=True,
+        reply_markup=get_back_keyboard()
+    )
+
+
+async def show_category_feed(query, category):
+    """Keyword-filtered feed for a cat_<category> button."""
+    cat_name, pattern = CATEGORY_FILTERS.get(category, ("News", None))
+    if not feeds_fresh():
+        await query.edit_message_text(f"🔄 _Fetching {cat_name}..._", parse_mode="Markdown")
+    articles = await fetch_news(limit=10)
+    
+    if pattern:
+        filtered = [a for a in articles if pattern.search(a['title'])]
+        articles = filtered[:5] if filtered else articles[:5]
+    else:
+        articles = articles[:5]
+    
+    await query.edit_message_text(
+        format_articles(articles, cat_name),
+        parse_mode="Markdown",
+        disable_web_page_preview=True,
+        reply_markup=get_back_keyboard()
+    )
+
+
+# Callback data prefix -> handler for "<prefix>_<payload>" buttons
+FEED_CALLBACKS = {
+    "src": show_source_feed,
+    "cat": show_category_feed,
+}
+
+
 async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
@@ -354,136 +613,88 @@ async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
         return
     
-    # Source-specific feeds
-    if data.startswith("src_"):
-        source = data.replace("src_", "")
-        source_names = {"deadline": "Deadline", "variety": "Variety", "thr": "Hollywood Reporter"}
-        await query.edit_message_text(f"🔄 _Fetching {source_names.get(source, source)}..._", parse_mode="Markdown")
-        articles = fetch_news_sync(source=source, limit=5)
-        await query.edit_message_text(
-            format_articles(articles, source_names.get(source, source)),
-            parse_mode="Markdown",
-            disable_web_page_preview=True,
-            reply_markup=get_back_keyboard()
-        )
-        return
-    
-    # Category feeds
-    if data.startswith("cat_"):
-        cat_map = {
-            "cat_aitech": ("AI & Tech", ["AI", "tech", "streaming", "digital", "algorithm"]),
-            "cat_guilds": ("Guilds & Labor", ["guild", "union", "strike", "WGA", "SAG", "DGA", "IATSE", "labor"]),
-            "cat_market": ("Box Office & Market", ["box office", "market", "stock", "earnings", "revenue"]),
-            "cat_spotlight": ("Spotlight", None),
-            "cat_trending": ("Trending", None),
-            "cat_general": ("General", None),
-        }
-        cat_name, keywords = cat_map.get(data, ("News", None))
-        await query.edit_message_text(f"🔄 _Fetching {cat_name}..._", parse_mode="Markdown")
-        articles = fetch_news_sync(limit=10)
-        
-        if keywords:
-            filtered = [a for a in articles if any(k.lower() in a['title'].lower() for k in keywords)]
-            articles = filtered[:5] if filtered else articles[:5]
-        else:
-            articles = articles[:5]
-        
-        await query.edit_message_text(
-            format_articles(articles, cat_name),
-            parse_mode="Markdown",
-            disable_web_page_preview=True,
-            reply_markup=get_back_keyboard()
-        )
+    # Source and category feeds
+    prefix, _, payload = data.partition("_")
+    handler = FEED_CALLBACKS.get(prefix)
+    if handler:
+        await handler(query, payload)
         return
     
     # Other buttons
-    responses = {
-        "vault": "🗄 *VAULT*\n\nYour vault is empty.\n\n_Reply 'save' after analysis to store._",
-        "scout": "🔎 *SCOUT*\n\nType a topic to investigate.",
-        "finance": "💵 *FINANCE*\n\nAsk about financing, funds, or deals.",
-        "archive": "📚 *ARCHIVE*\n\n_Coming soon: Historical deal database._",
-    }
-    
-    if data in responses:
-        await query.edit_message_text(responses[data], parse_mode="Markdown", reply_markup=get_back_keyboard())
+    if data in MENU_RESPONSES:
+        await query.edit_message_text(MENU_RESPONSES[data], parse_mode="Markdown", reply_markup=get_back_keyboard())
+
+
+# Persistent keyboard label -> command handler
+KEYBOARD_BUTTONS = {
+    "📰 Latest News": news_command,
+    "🔥 Trending": trending_command,
+    "🗄 Vault": vault_command,
+    "🔎 Scout": scout_command,
+    "💵 Finance": finance_command,
+    "📚 Archive": archive_command,
+}
 
 
 async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
-    user_message = update.message.text
+    chat_id = update.effective_chat.id
+    message = update.message
+    user_message = message.text
     
     # Handle persistent keyboard buttons
-    button_map = {
-        "📰 Latest News": "news",
-        "🔥 Trending": "trending", 
-        "🗄 Vault": "vault",
-        "🔎 Scout": "scout",
-        "💵 Finance": "finance",
-        "📚 Archive": "archive",
-    }
-    
-    if user_message in button_map:
-        cmd = button_map[user_message]
-        if cmd == "news":
-            articles = fetch_news_sync(limit=6)
-            await update.message.reply_text(
-                format_articles(articles, "Latest"),
-                parse_mode="Markdown",
-                disable_web_page_preview=True,
-                reply_markup=get_back_keyboard()
-            )
-        elif cmd == "trending":
-            articles = fetch_news_sync(limit=5)
-            await update.message.reply_text(
-                format_articles(articles, "Trending"),
-                parse_mode="Markdown",
-                disable_web_page_preview=True,
-                reply_markup=get_back_keyboard()
-            )
-        elif cmd == "vault":
-            await vault_command(update, context)
-        elif cmd == "scout":
-            await scout_command(update, context)
-        elif cmd == "finance":
-            await finance_command(update, context)
-        elif cmd == "archive":
-            await update.message.reply_text("📚 *ARCHIVE*\n\n_Coming soon._", parse_mode="Markdown")
+    handler = KEYBOARD_BUTTONS.get(user_message)
+    if handler:
+        await handler(update, context)
         return
     
     # Regular message handling with Gemini
-    if user_id not in conversations:
-        conversations[user_id] = []
-    
-    conversations[user_id].append({"role": "user", "parts": [user_message]})
-    if len(conversations[user_id]) > 20:
-        conversations[user_id] = conversations[user_id][-20:]
+    chat = conversations.get(user_id)
+    if chat is None:
+        chat = model.start_chat(history=[])
+    conversations[user_id] = chat  # mark the user as most recently active
     
-    await context.bot.send_chat_action(chat_id=update.effective_chat.id, action="typing")
+    typing = asyncio.create_task(keep_typing(context.bot, chat_id))
     
     try:
-        chat = model.start_chat(history=[])
+        # Opening messages don't depend on prior context, so identical ones can share a reply
+        cache_key = None if chat.history else response_cache_key(user_message)
+        assistant_message = get_cached_response(cache_key) if cache_key else None
+        sent = response = None
         
-        if len(conversations[user_id]) > 1:
-            context_msgs = conversations[user_id][-10:-1]
-            context_str = "\n".join([f"{'User' if m['role']=='user' else 'Assistant'}: {m['parts'][0]}" for m in context_msgs])
-            full_prompt = f"{SYSTEM_INSTRUCTION}\n\nConversation:\n{context_str}\n\nUser: {user_message}"
+        if assistant_message:
+            chat.history = [
+                {"role": "user", "parts": [user_message]},
+                {"role": "model", "parts": [assistant_message]},
+            ]
         else:
-            full_prompt = f"{SYSTEM_INSTRUCTION}\n\nUser: {user_message}"
+            response = await chat.send_message_async(user_message, stream=True)
+            sent, assistant_message = await stream_reply(message, response)
         
-        response = chat.send_message(full_prompt)
-        assistant_message = response.text
+        # Keep only the last 20 messages of context (reading history raises if the stream was blocked)
+        if len(chat.history) > 20:
+            chat.history = chat.history[-20:]
         
-        conversations[user_id].append({"role": "assistant", "parts": [assistant_message]})
-        
-        # Try markdown first, fall back to plain text
-        try:
-            await update.message.reply_text(assistant_message, parse_mode="Markdown")
-        except:
-            await update.message.reply_text(assistant_message)
+        # Share only replies that finished normally, never a blocked, cut-off or empty one
+        if cache_key and response and assistant_message and response.candidates[0].finish_reason.name == "STOP":
+            cache_response(cache_key, assistant_message)
         
     except Exception as e:
         logger.error(f"Gemini error: {e}")
-        await update.message.reply_text("⚠️ *ERROR* - Try again.", parse_mode="Markdown")
+        # An interrupted stream leaves the ChatSession unusable, so start fresh next turn
+        conversations.pop(user_id, None)
+        await message.reply_text("⚠️ *ERROR* - Try again.", parse_mode="Markdown")
+        return
+    finally:
+        typing.cancel()
+    
+    # Telegram rejects longer messages; the full reply stays in the chat history
+    reply = assistant_message[:MAX_MESSAGE_LENGTH]
+    try:
+        await deliver_reply(message, sent, reply)
+    except RetryAfter as e:
+        await asyncio.sleep(e.retry_after)
+        await deliver_reply(message, sent, reply)
 
 
 def main():
@@ -494,7 +705,7 @@ def main():
         logger.error("GOOGLE_API_KEY not set")
         return
     
-    application = Application.builder().token(TELEGRAM_TOKEN).post_init(post_init).build()
+    application = Application.builder().token(TELEGRAM_TOKEN).post_init(post_init).post_shutdown(post_shutdown).build()
     
     # Command handlers
     application.add_handler(CommandHandler("start", start))